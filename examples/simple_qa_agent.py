@@ -139,9 +139,10 @@ if __name__ == "__main__":
     storage = get_storage()
     traces = storage.list_traces(limit=10)
     
-    print(f"\nTotal traces captured: {storage.count()}")
-    print(f"Successful: {storage.count(status='success')}")
-    print(f"Errors: {storage.count(status='error')}")
+    counts = storage.count_by_status()
+    print(f"\nTotal traces captured: {sum(counts.values())}")
+    print(f"Successful: {counts.get('success', 0)}")
+    print(f"Errors: {counts.get('error', 0)}")
     
     print("\nRecent traces:")
     for i, trace in enumerate(traces, 1):
@@ -17,7 +17,17 @@ The library is designed to be non-intrusive:
 
 from evoloop.types import Trace, TraceContext
 from evoloop.storage import SQLiteStorage
-from evoloop.tracker import monitor, wrap, log, get_storage, set_storage, set_context
+from evoloop.tracker import (
+    monitor,
+    wrap,
+    log,
+    get_storage,
+    set_storage,
+    set_context,
+    set_background_writes,
+    flush,
+    get_dropped_count,
+)
 
 __version__ = "0.2.1"
 
@@ -29,6 +39,9 @@ __all__ = [
     # Storage
     "get_storage",
     "set_storage",
+    "set_background_writes",
+    "flush",
+    "get_dropped_count",
     "SQLiteStorage",
     # Types
     "Trace",
@@ -0,0 +1,142 @@
+"""
+Conversion of arbitrary trace payloads to JSON-compatible values.
+
+This module is kept free of dynamic features so it can be compiled ahead of
+time with mypyc for a faster serialization hot path:
+
+    mypyc src/evoloop/_serialize.py
+
+Python imports the compiled extension in preference to this file when both
+are present, so the pure-Python version remains the fallback.
+"""
+
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable
+
+# type -> converter for objects that aren't JSON primitives or containers.
+# Built on first sighting of each type so later calls skip the reflection.
+# Capped so programs that create classes dynamically can't grow it (and keep
+# those classes alive) without bound; past the cap, plans aren't cached.
+_TYPE_PLANS: dict[type, Callable[[Any], Any]] = {}
+_MAX_TYPE_PLANS = 1024
+
+
+def _model_dump(obj: Any) -> Any:
+    return obj.model_dump()
+
+
+def _legacy_dict(obj: Any) -> Any:
+    return obj.dict()
+
+
+def _dataclass_plan(cls: type) -> Callable[[Any], Any]:
+    names = tuple(f.name for f in fields(cls))
+
+    def convert(obj: Any) -> Any:
+        return {name: _convert(getattr(obj, name)) for name in names}
+
+    return convert
+
+
+def _convert_list(obj: list[Any]) -> list[Any]:
+    """Convert list items, copying the list only once an item changes."""
+    out: list[Any] | None = None
+    for i, item in enumerate(obj):
+        converted = _convert(item)
+        if out is None:
+            if converted is item:
+                continue
+            out = obj[:i]
+        out.append(converted)
+    return obj if out is None else out
+
+
+def _convert_dict(obj: dict[Any, Any]) -> dict[Any, Any]:
+    """Convert dict values, copying the dict only once a value changes."""
+    out: dict[Any, Any] | None = None
+    for key, value in obj.items():
+        converted = _convert(value)
+        if out is None:
+            if converted is value:
+                continue
+            out = {}
+            for seen_key, seen_value in obj.items():
+                if seen_key is key:
+                    break
+                out[seen_key] = seen_value
+        out[key] = converted
+    return obj if out is None else out
+
+
+def _build_plan(cls: type) -> Callable[[Any], Any]:
+    """Choose how to convert instances of cls, based only on the class."""
+    # Handle dataclasses
+    if is_dataclass(cls):
+        return _dataclass_plan(cls)
+
+    # Handle Pydantic models
+    if hasattr(cls, "model_dump"):
+        return _model_dump
+    if hasattr(cls, "dict"):
+        return _legacy_dict
+
+    # Fallback to string representation
+    return str
+
+
+def to_json_compatible(obj: Any) -> Any:
+    """
+    Serialize complex objects to JSON-compatible format.
+
+    Handles LangChain messages, Pydantic models, dataclasses, and other
+    common types.
+    """
+    try:
+        return _convert(obj)
+    except RecursionError:
+        # Self-referencing structures (e.g. a dataclass with a parent
+        # pointer) are stored by their string representation instead
+        return str(obj)
+
+
+def _convert(obj: Any) -> Any:
+    """Convert obj recursively; see to_json_compatible()."""
+    # Fast path: None and exact primitive types need no conversion, which
+    # covers most monitored calls without any further dispatch
+    cls = type(obj)
+    if obj is None or cls is str or cls is int or cls is float or cls is bool:
+        return obj
+    # Exact containers (message lists, state dicts) skip the isinstance checks
+    if cls is dict:
+        return _convert_dict(obj)
+    if cls is list:
+        return _convert_list(obj)
+
+    # Handle subclasses of basic types (e.g. str-based enums)
+    if isinstance(obj, (str, int, float, bool)):
+        return obj
+
+    # Handle list and dict subclasses. Containers that are already
+    # JSON-compatible are returned as-is rather than rebuilt
+    if isinstance(obj, list):
+        return _convert_list(obj)
+    if isinstance(obj, dict):
+        return _convert_dict(obj)
+
+    # Handle LangChain BaseMessage (duck typing to avoid import). Checked per
+    # instance: "content"/"type" are usually instance attributes, so the class
+    # alone can't tell
+    if hasattr(obj, "content") and hasattr(obj, "type"):
+        return {
+            "type": getattr(obj, "type", obj.__class__.__name__),
+            "content": obj.content,
+            "additional_kwargs": getattr(obj, "additional_kwargs", {}),
+        }
+
+    # Everything else is dispatched on the type, with the plan cached
+    plan = _TYPE_PLANS.get(cls)
+    if plan is None:
+        plan = _build_plan(cls)
+        if len(_TYPE_PLANS) < _MAX_TYPE_PLANS:
+            _TYPE_PLANS[cls] = plan
+    return plan(obj)
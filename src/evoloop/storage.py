@@ -8,20 +8,237 @@ IMPORTANT: All storage operations are fail-safe. Errors are logged but never
 raised, ensuring that tracing never crashes the user's application.
 """
 
+import atexit
 import json
+import os
 import sqlite3
 import sys
 import threading
+import time
+import traceback
+import weakref
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Iterator, Optional
+from typing import Any, Iterator, Optional, Union
 
-from evoloop.types import Trace
+from evoloop.types import Trace, TraceContext
+
+try:
+    import orjson
+except ImportError:  # Optional speedup: pip install evoloop[fast]
+    orjson = None  # type: ignore[assignment]
+
+# Column order of _INSERT_SQL and of every SELECT below
+_COLUMNS = (
+    "id", "input", "output", "context", "timestamp",
+    "duration_ms", "status", "error", "metadata",
+)
+
+_INSERT_SQL = """
+    INSERT OR REPLACE INTO traces
+    (id, input, output, context, timestamp, duration_ms, status, error, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Fixed query texts, kept identical across calls so sqlite3's per-connection
+# statement cache always hits. Reads name their columns so rows can be
+# unpacked by position
+_SELECT_TRACES = f"SELECT {', '.join(_COLUMNS)} FROM traces"
+_SELECT_BY_ID_SQL = f"{_SELECT_TRACES} WHERE id = ?"
+_SELECT_BY_IDS_SQL = f"{_SELECT_TRACES} WHERE id IN ({{}})"
+_COUNT_SQL = "SELECT COUNT(*) FROM traces"
+_COUNT_BY_STATUS_SQL = "SELECT COUNT(*) FROM traces WHERE status = ?"
+_COUNT_GROUPED_SQL = "SELECT status, COUNT(*) FROM traces GROUP BY status"
+_LIST_SQL = f"{_SELECT_TRACES} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+_LIST_BY_STATUS_SQL = (
+    f"{_SELECT_TRACES} WHERE status = ? "
+    "ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+)
+# Keyset pagination: resume strictly after the (timestamp, id) of the last
+# row seen, which an index seek finds without skipping OFFSET rows
+_LIST_BEFORE_SQL = (
+    f"{_SELECT_TRACES} WHERE (timestamp, id) < (?, ?) "
+    "ORDER BY timestamp DESC, id DESC LIMIT ?"
+)
+_LIST_BY_STATUS_BEFORE_SQL = (
+    f"{_SELECT_TRACES} WHERE status = ? AND (timestamp, id) < (?, ?) "
+    "ORDER BY timestamp DESC, id DESC LIMIT ?"
+)
+_ITER_SQL = f"{_SELECT_TRACES} ORDER BY timestamp DESC, id DESC"
+_CLEAR_SQL = "DELETE FROM traces"
+
+# Ids bound per load_many() query, under SQLite's default limit of 999 host
+# parameters on older builds
+_LOAD_MANY_CHUNK = 900
+
+# Rows fetched per lock acquisition when streaming with iter_traces()
+_ITER_ARRAYSIZE = 1000
+
+# Size of sqlite3's prepared statement cache per connection
+_STATEMENT_CACHE_SIZE = 256
+
+# Bump when the index definitions change so existing databases rebuild them
+_SCHEMA_VERSION = 2
+
+# Runs on every start; each statement is a no-op once the schema exists
+_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS traces (
+        id TEXT PRIMARY KEY,
+        input TEXT NOT NULL,
+        output TEXT NOT NULL,
+        context TEXT,
+        timestamp TEXT NOT NULL,
+        duration_ms REAL,
+        status TEXT NOT NULL DEFAULT 'success',
+        error TEXT,
+        metadata TEXT
+    );
+    
+    -- Indexes for common queries. id breaks timestamp ties so pages are
+    -- stable and keyset pagination can seek on (timestamp, id)
+    CREATE INDEX IF NOT EXISTS idx_traces_timestamp
+    ON traces(timestamp DESC, id DESC);
+    
+    -- Serves both count(status=...) and list_traces(status=...) ordered by
+    -- timestamp
+    CREATE INDEX IF NOT EXISTS idx_traces_status_timestamp
+    ON traces(status, timestamp DESC, id DESC);
+"""
+
+# Runs before _SCHEMA_SQL when PRAGMA user_version is older than
+# _SCHEMA_VERSION: drops indexes with outdated definitions, including the
+# old status-only index, so _SCHEMA_SQL recreates the current ones
+_UPGRADE_SQL = f"""
+    DROP INDEX IF EXISTS idx_traces_timestamp;
+    DROP INDEX IF EXISTS idx_traces_status_timestamp;
+    DROP INDEX IF EXISTS idx_traces_status;
+    PRAGMA user_version = {_SCHEMA_VERSION};
+"""
+
+# Accepted values for SQLiteStorage(sync_mode=...), mapped to PRAGMA synchronous
+_SYNC_MODES = {"full": "FULL", "normal": "NORMAL", "off": "OFF"}
+
+
+# EVOLOOP_DEBUG=1 reports every error with its traceback instead of
+# rate-limited one-line warnings
+_DEBUG = os.environ.get("EVOLOOP_DEBUG") == "1"
+
+# Minimum seconds between two warnings written to stderr
+_ERROR_INTERVAL = 1.0
+_last_error_time = float("-inf")
+_suppressed_errors = 0
+_error_lock = threading.Lock()
 
 
 def _log_error(message: str) -> None:
-    """Log an error to stderr without raising."""
-    print(f"[EvoLoop Warning] {message}", file=sys.stderr)
+    """
+    Log an error to stderr without raising.
+    
+    At most one warning per second is written so a failing storage in a hot
+    loop doesn't flood stderr; the next warning reports how many were skipped.
+    """
+    global _last_error_time, _suppressed_errors
+    
+    if _DEBUG:
+        sys.stderr.write(f"[EvoLoop Warning] {message}\n")
+        if sys.exc_info()[0] is not None:
+            traceback.print_exc()
+        return
+    
+    with _error_lock:
+        now = time.monotonic()
+        if now - _last_error_time < _ERROR_INTERVAL:
+            _suppressed_errors += 1
+            return
+        if _suppressed_errors:
+            message += f" ({_suppressed_errors} earlier warnings suppressed)"
+        _last_error_time = now
+        _suppressed_errors = 0
+    sys.stderr.write(f"[EvoLoop Warning] {message}\n")
+
+
+# json.dumps() only reuses its cached encoder when called with default
+# arguments; build ours once instead of per call
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str)
+
+
+def _dumps(obj: Any) -> str:
+    """
+    Serialize an object to JSON text.
+    
+    Uses orjson when it is installed, falling back to the stdlib json module
+    otherwise or for values orjson rejects, such as integers over 64 bits.
+    Unknown types are converted with str() in both cases. Either way the
+    result is str, so payload columns hold TEXT regardless of the
+    environment and LIKE filters match every row.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj,
+                default=str,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+            ).decode("utf-8")
+        except TypeError:
+            pass
+    return _JSON_ENCODER.encode(obj)
+
+
+def _loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse stored JSON, using orjson when it is installed.
+    
+    Accepts bytes as well as str: databases written by earlier versions may
+    hold BLOB payloads.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # e.g. NaN/Infinity written by the stdlib fallback
+            pass
+    return json.loads(data)
+
+
+# Live storages, so buffered rows can be flushed at interpreter exit
+_open_storages: "weakref.WeakSet[SQLiteStorage]" = weakref.WeakSet()
+
+
+def _flush_open_storages() -> None:
+    """Flush every live SQLiteStorage. Registered with atexit."""
+    for storage in list(_open_storages):
+        storage.flush()
+
+
+atexit.register(_flush_open_storages)
+
+# Connections inherited across fork(). SQLite must not touch them in the
+# child, not even to close them, so they are kept referenced forever.
+_inherited_connections: list[sqlite3.Connection] = []
+
+
+def _reset_storages_after_fork() -> None:
+    """
+    Give every open SQLiteStorage fresh per-process state in a forked child.
+    
+    Locks may have been held by parent threads that don't exist in the
+    child, the connection belongs to the parent, and the flush timer thread
+    is gone. Pending rows belong to the parent, which writes them.
+    """
+    global _error_lock
+    
+    _error_lock = threading.Lock()
+    for storage in list(_open_storages):
+        storage._lock = threading.RLock()
+        if storage._conn is not None:
+            _inherited_connections.append(storage._conn)
+            storage._conn = None
+        storage._flush_timer = None
+        storage._pending = []
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_storages_after_fork)
 
 
 class BaseStorage(ABC):
@@ -57,6 +274,39 @@ class BaseStorage(ABC):
         """Iterate over all traces."""
         pass
 
+    def load_many(self, trace_ids: list[str]) -> dict[str, Trace]:
+        """
+        Load several traces by ID, keyed by ID. Missing IDs are omitted.
+        
+        Backends may override this with a batched query.
+        """
+        traces: dict[str, Trace] = {}
+        for trace_id in trace_ids:
+            trace = self.load(trace_id)
+            if trace is not None:
+                traces[trace_id] = trace
+        return traces
+
+    def count_by_status(self) -> dict[str, int]:
+        """
+        Count traces per status in one pass.
+        
+        Backends may override this with a single aggregate query.
+        """
+        counts: dict[str, int] = {}
+        for trace in self.iter_traces():
+            counts[trace.status] = counts.get(trace.status, 0) + 1
+        return counts
+
+    def save_many(self, traces: list[Trace]) -> None:
+        """Save several traces. Backends may override this to batch writes."""
+        for trace in traces:
+            self.save(trace)
+
+    def flush(self) -> None:
+        """Persist any buffered traces. No-op for unbuffered backends."""
+        pass
+
 
 class SQLiteStorage(BaseStorage):
     """
@@ -64,107 +314,216 @@ class SQLiteStorage(BaseStorage):
     
     Features:
     - Zero configuration (auto-creates database file)
-    - Thread-safe operations
+    - Thread-safe operations (one persistent connection guarded by a lock)
     - Efficient querying with indexes
-    - JSON serialization for complex data
+    - JSON serialization for complex data (stored as TEXT)
+    - Optional batched writes (many traces per transaction)
     
     Args:
         db_path: Path to the SQLite database file. Defaults to "evoloop.db".
+        batch_size: Number of traces to buffer before writing them in a single
+            transaction. Defaults to 1 (every trace is written immediately).
+            Buffered traces are flushed automatically when the batch fills,
+            flush_interval seconds after the first one was buffered, before
+            any read, on close() and at interpreter exit, or explicitly via
+            flush().
+        flush_interval: Maximum seconds a buffered trace waits before being
+            written when batch_size > 1. Defaults to 1.0.
+        sync_mode: SQLite synchronous level: "full", "normal" or "off".
+            Defaults to "normal", which together with WAL journaling is safe
+            against application crashes; use "full" if you also need
+            durability across power loss.
     """
 
-    def __init__(self, db_path: str = "evoloop.db"):
+    def __init__(
+        self,
+        db_path: str = "evoloop.db",
+        batch_size: int = 1,
+        sync_mode: str = "normal",
+        flush_interval: float = 1.0,
+    ):
+        if sync_mode not in _SYNC_MODES:
+            raise ValueError(
+                f"sync_mode must be one of {sorted(_SYNC_MODES)}, got {sync_mode!r}"
+            )
         self.db_path = Path(db_path)
-        self._local = threading.local()
+        self.batch_size = max(1, batch_size)
+        self.sync_mode = sync_mode
+        self.flush_interval = flush_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        # Serialized rows awaiting insertion; no Trace objects are kept alive
+        self._pending: list[tuple[Any, ...]] = []
+        self._flush_timer: Optional[threading.Timer] = None
+        # Reentrant so reads can flush() while holding the lock
+        self._lock = threading.RLock()
         self._init_db()
+        _open_storages.add(self)
 
     def _get_connection(self) -> sqlite3.Connection:
-        """Get a thread-local database connection."""
-        if not hasattr(self._local, "connection"):
-            self._local.connection = sqlite3.connect(
+        """
+        Get the shared database connection, opening it on first use.
+        
+        A single long-lived connection lets sqlite3 reuse its prepared
+        statement cache across calls. Callers must hold self._lock.
+        """
+        if self._conn is None:
+            self._conn = sqlite3.connect(
                 str(self.db_path),
                 check_same_thread=False,
+                cached_statements=_STATEMENT_CACHE_SIZE,
             )
-            self._local.connection.row_factory = sqlite3.Row
-        return self._local.connection
+            self._configure_connection(self._conn)
+        return self._conn
+
+    def _configure_connection(self, conn: sqlite3.Connection) -> None:
+        """Apply performance PRAGMAs to a freshly opened connection."""
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={_SYNC_MODES[self.sync_mode]}")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-20000")
+            # Memory-map up to 256 MB of the database file for faster reads
+            conn.execute("PRAGMA mmap_size=268435456")
+        except Exception as e:
+            _log_error(f"Failed to configure database connection: {e}")
 
     def _init_db(self) -> None:
-        """Initialize the database schema."""
+        """
+        Initialize the database schema.
+        
+        The DDL runs as one script in a single transaction. The table and
+        indexes are created if missing on every start; indexes are only
+        rebuilt when PRAGMA user_version is older than the current schema.
+        """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS traces (
-                    id TEXT PRIMARY KEY,
-                    input TEXT NOT NULL,
-                    output TEXT NOT NULL,
-                    context TEXT,
-                    timestamp TEXT NOT NULL,
-                    duration_ms REAL,
-                    status TEXT NOT NULL DEFAULT 'success',
-                    error TEXT,
-                    metadata TEXT
-                )
-            """)
-            
-            # Create indexes for common queries
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_traces_timestamp 
-                ON traces(timestamp DESC)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_traces_status 
-                ON traces(status)
-            """)
-            
-            conn.commit()
+            with self._lock:
+                conn = self._get_connection()
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                script = _SCHEMA_SQL
+                if version < _SCHEMA_VERSION:
+                    script = _UPGRADE_SQL + script
+                try:
+                    conn.executescript(f"BEGIN;{script}COMMIT;")
+                except sqlite3.Error:
+                    # A statement failed after BEGIN; don't leave the
+                    # half-applied script open for later writes to commit
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
         except Exception as e:
             _log_error(f"Failed to initialize database: {e}")
 
     def save(self, trace: Trace) -> None:
         """
         Save a trace to the database.
-        
+
+        The trace is serialized immediately. With batch_size > 1 the row is
+        buffered and written together with the rest of the batch once the
+        buffer is full or flush_interval has passed, whichever comes first.
+
         This method is fail-safe: errors are logged but never raised,
         ensuring that tracing never crashes the user's application.
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            data = trace.to_dict()
-            
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO traces 
-                (id, input, output, context, timestamp, duration_ms, status, error, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    data["id"],
-                    json.dumps(data["input"], ensure_ascii=False, default=str),
-                    json.dumps(data["output"], ensure_ascii=False, default=str),
-                    json.dumps(data["context"], ensure_ascii=False) if data["context"] else None,
-                    data["timestamp"],
-                    data["duration_ms"],
-                    data["status"],
-                    data["error"],
-                    json.dumps(data["metadata"], ensure_ascii=False) if data["metadata"] else None,
-                ),
-            )
-            conn.commit()
+            row = self._trace_to_row(trace)
         except Exception as e:
             # Fail-safe: log the error but NEVER crash the user's app
             _log_error(f"Failed to save trace {trace.id}: {e}")
+            return
+        
+        with self._lock:
+            self._pending.append(row)
+            should_flush = len(self._pending) >= self.batch_size
+            if not should_flush and self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if should_flush:
+            self.flush()
+
+    def save_many(self, traces: list[Trace]) -> None:
+        """
+        Save several traces in a single transaction.
+        
+        Any traces already buffered are written in the same transaction.
+        If the batch insert fails, each trace is retried on its own so one
+        bad trace doesn't drop the rest.
+        
+        This method is fail-safe: errors are logged but never raised.
+        """
+        rows = []
+        for trace in traces:
+            try:
+                rows.append(self._trace_to_row(trace))
+            except Exception as e:
+                _log_error(f"Failed to save trace {trace.id}: {e}")
+        
+        with self._lock:
+            for row in rows:
+                self._pending.append(row)
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write all buffered traces in a single transaction.
+
+        This method is fail-safe: errors are logged but never raised.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+
+            conn = None
+            try:
+                conn = self._get_connection()
+                conn.execute("BEGIN")
+                conn.executemany(_INSERT_SQL, rows)
+                conn.commit()
+            except Exception as e:
+                # Fail-safe: log the error but NEVER crash the user's app
+                if conn is not None and conn.in_transaction:
+                    conn.rollback()
+                if conn is None or len(rows) == 1:
+                    _log_error(f"Failed to save {len(rows)} trace(s): {e}")
+                    return
+                # Retry row by row so one bad trace doesn't drop the batch
+                for row in rows:
+                    try:
+                        conn.execute(_INSERT_SQL, row)
+                        conn.commit()
+                    except Exception as row_error:
+                        if conn.in_transaction:
+                            conn.rollback()
+                        _log_error(f"Failed to save trace {row[0]}: {row_error}")
+
+    def _trace_to_row(self, trace: Trace) -> tuple[Any, ...]:
+        """Convert a Trace object to a row tuple for _INSERT_SQL."""
+        data = trace.to_dict()
+        return (
+            data["id"],
+            _dumps(data["input"]),
+            _dumps(data["output"]),
+            _dumps(data["context"]) if data["context"] else None,
+            data["timestamp"],
+            data["duration_ms"],
+            data["status"],
+            data["error"],
+            _dumps(data["metadata"]) if data["metadata"] else None,
+        )
 
     def load(self, trace_id: str) -> Optional[Trace]:
         """Load a trace by ID. Returns None if not found or on error."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM traces WHERE id = ?", (trace_id,))
-            row = cursor.fetchone()
+            with self._lock:
+                self.flush()
+                row = self._get_connection().execute(
+                    _SELECT_BY_ID_SQL, (trace_id,)
+                ).fetchone()
             
             if row is None:
                 return None
@@ -174,29 +533,74 @@ class SQLiteStorage(BaseStorage):
             _log_error(f"Failed to load trace {trace_id}: {e}")
             return None
 
+    def load_many(self, trace_ids: list[str]) -> dict[str, Trace]:
+        """
+        Load several traces by ID with one query per 900 IDs.
+        
+        Returns a dict keyed by trace ID; IDs that are not found are omitted.
+        Returns {} on error.
+        """
+        try:
+            unique_ids = list(dict.fromkeys(trace_ids))
+            rows: list[tuple[Any, ...]] = []
+            with self._lock:
+                self.flush()
+                conn = self._get_connection()
+                for start in range(0, len(unique_ids), _LOAD_MANY_CHUNK):
+                    chunk = unique_ids[start:start + _LOAD_MANY_CHUNK]
+                    query = _SELECT_BY_IDS_SQL.format(", ".join("?" * len(chunk)))
+                    rows.extend(conn.execute(query, chunk).fetchall())
+            
+            return {row[0]: self._row_to_trace(row) for row in rows}
+        except Exception as e:
+            _log_error(f"Failed to load {len(trace_ids)} trace(s): {e}")
+            return {}
+
     def list_traces(
         self,
         limit: int = 100,
         offset: int = 0,
         status: Optional[str] = None,
+        before_timestamp: Optional[str] = None,
+        before_id: str = "",
     ) -> list[Trace]:
-        """List traces with optional filtering. Returns empty list on error."""
+        """
+        List traces, newest first, with optional filtering.
+        
+        Pass the timestamp and id of the last trace of a page as
+        before_timestamp/before_id to get the next page. Unlike a growing
+        offset, this costs the same for every page. offset is ignored when
+        before_timestamp is given.
+        
+        Returns empty list on error.
+        
+        Example:
+            >>> page = storage.list_traces(limit=100)
+            >>> while page:
+            ...     last = page[-1]
+            ...     page = storage.list_traces(
+            ...         limit=100, before_timestamp=last.timestamp, before_id=last.id
+            ...     )
+        """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            query = "SELECT * FROM traces"
-            params: list[Any] = []
-            
-            if status:
-                query += " WHERE status = ?"
-                params.append(status)
-            
-            query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
+            params: tuple[Any, ...]
+            if before_timestamp is not None:
+                if status:
+                    query = _LIST_BY_STATUS_BEFORE_SQL
+                    params = (status, before_timestamp, before_id, limit)
+                else:
+                    query = _LIST_BEFORE_SQL
+                    params = (before_timestamp, before_id, limit)
+            elif status:
+                query = _LIST_BY_STATUS_SQL
+                params = (status, limit, offset)
+            else:
+                query = _LIST_SQL
+                params = (limit, offset)
             
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+            with self._lock:
+                self.flush()
+                rows = self._get_connection().execute(query, params).fetchall()
             
             return [self._row_to_trace(row) for row in rows]
         except Exception as e:
@@ -206,52 +610,100 @@ class SQLiteStorage(BaseStorage):
     def count(self, status: Optional[str] = None) -> int:
         """Count total traces. Returns 0 on error."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            if status:
-                cursor.execute("SELECT COUNT(*) FROM traces WHERE status = ?", (status,))
-            else:
-                cursor.execute("SELECT COUNT(*) FROM traces")
-            
-            return cursor.fetchone()[0]
+            with self._lock:
+                self.flush()
+                conn = self._get_connection()
+                if status:
+                    cursor = conn.execute(_COUNT_BY_STATUS_SQL, (status,))
+                else:
+                    cursor = conn.execute(_COUNT_SQL)
+                return cursor.fetchone()[0]
         except Exception as e:
             _log_error(f"Failed to count traces: {e}")
             return 0
 
-    def iter_traces(self) -> Iterator[Trace]:
-        """Iterate over all traces."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+    def count_by_status(self) -> dict[str, int]:
+        """
+        Count traces per status with a single query. Returns {} on error.
         
-        cursor.execute("SELECT * FROM traces ORDER BY timestamp DESC")
+        Example:
+            >>> storage.count_by_status()
+            {'error': 1, 'success': 4}
+        """
+        try:
+            with self._lock:
+                self.flush()
+                rows = self._get_connection().execute(_COUNT_GROUPED_SQL).fetchall()
+            return {status: n for status, n in rows}
+        except Exception as e:
+            _log_error(f"Failed to count traces: {e}")
+            return {}
+
+    def iter_traces(self, batch_size: int = _ITER_ARRAYSIZE) -> Iterator[Trace]:
+        """
+        Iterate over all traces, newest first.
         
-        for row in cursor:
-            yield self._row_to_trace(row)
-
-    def _row_to_trace(self, row: sqlite3.Row) -> Trace:
-        """Convert a database row to a Trace object."""
-        return Trace.from_dict({
-            "id": row["id"],
-            "input": json.loads(row["input"]),
-            "output": json.loads(row["output"]),
-            "context": json.loads(row["context"]) if row["context"] else None,
-            "timestamp": row["timestamp"],
-            "duration_ms": row["duration_ms"],
-            "status": row["status"],
-            "error": row["error"],
-            "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
-        })
+        Args:
+            batch_size: Rows fetched from SQLite per round trip. Larger
+                batches mean fewer lock acquisitions; smaller ones bound
+                memory for very large payloads.
+        """
+        with self._lock:
+            self.flush()
+            cursor = self._get_connection().execute(_ITER_SQL)
+            cursor.arraysize = max(1, batch_size)
+        
+        # Fetch in chunks so the shared connection is not held between yields
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany()
+            if not rows:
+                break
+            for row in rows:
+                yield self._row_to_trace(row)
+
+    def _row_to_trace(self, row: tuple[Any, ...]) -> Trace:
+        """
+        Convert a database row (in _COLUMNS order) to a Trace object.
+        
+        Builds the Trace directly rather than through Trace.from_dict(), which
+        would need an intermediate dict per row.
+        """
+        (trace_id, input_, output, context, timestamp,
+         duration_ms, status, error, metadata) = row
+        context_data = _loads(context) if context else None
+        return Trace(
+            id=trace_id,
+            input=_loads(input_),
+            output=_loads(output),
+            context=TraceContext.from_dict(context_data) if context_data else None,
+            timestamp=timestamp,
+            duration_ms=duration_ms,
+            status=status,
+            error=error,
+            metadata=_loads(metadata) if metadata else {},
+        )
 
     def clear(self) -> None:
         """Clear all traces from the database."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM traces")
-        conn.commit()
+        with self._lock:
+            self._pending.clear()
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            conn = self._get_connection()
+            conn.execute(_CLEAR_SQL)
+            conn.commit()
 
     def close(self) -> None:
-        """Close the database connection."""
-        if hasattr(self._local, "connection"):
-            self._local.connection.close()
-            delattr(self._local, "connection")
+        """Flush buffered traces and close the database connection."""
+        with self._lock:
+            self.flush()
+            if self._conn is not None:
+                try:
+                    # Let SQLite refresh planner statistics where they're stale
+                    self._conn.execute("PRAGMA optimize")
+                except Exception as e:
+                    _log_error(f"Failed to optimize database: {e}")
+                self._conn.close()
+                self._conn = None
@@ -11,14 +11,19 @@ All methods are designed to be non-intrusive and framework-agnostic.
 
 from __future__ import annotations
 
-import asyncio
+import atexit
 import functools
 import inspect
+import os
+import queue
+import random
+import threading
 import time
 from contextvars import ContextVar
-from typing import Any, Callable, Optional, TypeVar, Union
+from pathlib import Path
+from typing import Any, Callable, Literal, Optional, TypeVar, Union
 
-from evoloop.storage import BaseStorage, SQLiteStorage
+from evoloop.storage import BaseStorage, SQLiteStorage, _flush_open_storages, _log_error
 from evoloop.types import Trace, TraceContext
 
 # Type variable for generic function signatures
@@ -27,26 +32,69 @@ F = TypeVar("F", bound=Callable[..., Any])
 # Global storage instance (configurable)
 _storage: ContextVar[Optional[BaseStorage]] = ContextVar("evoloop_storage", default=None)
 
+# Default storages shared by every thread/context that hasn't called
+# set_storage(), keyed by resolved database path
+_default_storages: dict[Path, SQLiteStorage] = {}
+_default_storages_lock = threading.Lock()
+
 # Context variable for passing additional context to traces
 _current_context: ContextVar[Optional[TraceContext]] = ContextVar("evoloop_context", default=None)
 
+# Write-behind queue used when background writes are enabled
+_write_queue: queue.Queue[tuple[BaseStorage, Trace]] = queue.Queue()
+_writer_thread: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+_background_writes = False
+
+# Maximum number of traces the background writer persists per batch
+_WRITER_BATCH_SIZE = 500
+
+# Queue length above which traces are sampled instead of always enqueued
+_QUEUE_HIGH_WATER = 10_000
+
+
+def _read_overload_sample_rate() -> float:
+    """Read EVOLOOP_OVERLOAD_SAMPLE_RATE, the fraction of traces kept under load."""
+    raw = os.environ.get("EVOLOOP_OVERLOAD_SAMPLE_RATE", "0.1")
+    try:
+        return min(1.0, max(0.0, float(raw)))
+    except ValueError:
+        _log_error(f"Invalid EVOLOOP_OVERLOAD_SAMPLE_RATE {raw!r}, using 0.1")
+        return 0.1
+
+
+_overload_sample_rate = _read_overload_sample_rate()
+_dropped_count = 0
+
 
 def get_storage() -> BaseStorage:
     """
     Get the current storage instance.
     
-    Creates a default SQLiteStorage if none is configured.
+    Falls back to a default SQLiteStorage ("evoloop.db" in the working
+    directory) if none is configured. The default is created once per
+    database path and shared across threads.
     
     Returns:
         The current storage backend.
     """
     storage = _storage.get()
     if storage is None:
-        storage = SQLiteStorage()
+        storage = _get_default_storage()
         _storage.set(storage)
     return storage
 
 
+def _get_default_storage(db_path: str = "evoloop.db") -> SQLiteStorage:
+    """Get the shared default storage for db_path, creating it on first use."""
+    key = Path(db_path).resolve()
+    with _default_storages_lock:
+        storage = _default_storages.get(key)
+        if storage is None:
+            storage = _default_storages[key] = SQLiteStorage(db_path)
+        return storage
+
+
 def set_storage(storage: BaseStorage) -> None:
     """
     Set the global storage backend.
@@ -81,7 +129,207 @@ def get_context() -> Optional[TraceContext]:
 
 def clear_context() -> None:
     """Clear the current context."""
-    _current_context.set(None)
+    # Every monitored call ends here; skip the ContextVar write (and the
+    # new context version it creates) when nothing was set
+    if _current_context.get() is not None:
+        _current_context.set(None)
+
+
+def set_background_writes(enabled: bool = True) -> None:
+    """
+    Persist traces from a background thread instead of the caller's thread.
+    
+    When enabled, @monitor, wrap() and log() only enqueue the trace, so the
+    monitored function never waits on serialization or disk I/O. Queued
+    traces are serialized and written in batches by a daemon thread; call
+    flush() before reading traces back. Pending traces are flushed
+    automatically at interpreter exit.
+    
+    Because serialization is deferred, inputs and outputs are recorded in
+    whatever state they are in when written. Avoid mutating them until
+    flush() if the trace must reflect the state at call time.
+    
+    Args:
+        enabled: Whether to enable background writes.
+    
+    Example:
+        >>> from evoloop import set_background_writes, flush, get_storage
+        >>> set_background_writes(True)
+        >>> # ... run monitored agents ...
+        >>> flush()
+        >>> traces = get_storage().list_traces()
+    """
+    global _background_writes
+    
+    with _writer_lock:
+        if enabled:
+            _ensure_writer()
+        _background_writes = enabled
+
+
+def _ensure_writer() -> None:
+    """Start the writer thread if it isn't running. Caller holds _writer_lock."""
+    global _writer_thread
+    
+    if _writer_thread is None or not _writer_thread.is_alive():
+        _writer_thread = threading.Thread(
+            target=_writer_loop,
+            name="evoloop-writer",
+            daemon=True,
+        )
+        _writer_thread.start()
+
+
+def _reset_writer_after_fork() -> None:
+    """
+    Give a forked child its own writer state and registry lock.
+    
+    Only the forking thread survives fork(), so the inherited writer thread
+    is gone. Traces still queued belong to the parent, which writes them.
+    The child starts a fresh writer on its first trace.
+    """
+    global _write_queue, _writer_thread, _writer_lock, _default_storages_lock
+    
+    _write_queue = queue.Queue()
+    _writer_thread = None
+    _writer_lock = threading.Lock()
+    _default_storages_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_writer_after_fork)
+
+
+def flush() -> None:
+    """
+    Block until all queued traces are persisted.
+    
+    Waits for the background writer (if running) to drain its queue, then
+    flushes the current storage backend and every open SQLiteStorage, so
+    traces buffered for storages set in other threads or contexts are
+    written too.
+    """
+    writer = _writer_thread
+    if writer is not None and writer.is_alive():
+        _write_queue.join()
+    storage = _storage.get()
+    if storage is not None:
+        storage.flush()
+    _flush_open_storages()
+
+
+# Runs before the storage module's own exit hook (atexit is LIFO), so queued
+# traces reach storage before buffered rows are flushed
+atexit.register(flush)
+
+
+def get_dropped_count() -> int:
+    """
+    Get the number of traces dropped because the write queue was saturated.
+    
+    When background writes are enabled and more than 10,000 traces are
+    waiting to be written, only a sample of new traces is kept (10% by
+    default, configurable with the EVOLOOP_OVERLOAD_SAMPLE_RATE environment
+    variable) and the rest are counted here.
+    """
+    return _dropped_count
+
+
+def _save_trace(storage: BaseStorage, trace: Trace) -> None:
+    """Persist a trace directly or hand it to the background writer."""
+    global _dropped_count
+    
+    if not _background_writes:
+        storage.save(trace)
+        return
+    
+    if _writer_thread is None:
+        # First trace since a fork(); start this process's writer
+        with _writer_lock:
+            _ensure_writer()
+    
+    # Shed load rather than let the queue grow without bound
+    if (
+        _write_queue.qsize() > _QUEUE_HIGH_WATER
+        and random.random() >= _overload_sample_rate
+    ):
+        with _writer_lock:
+            _dropped_count += 1
+        return
+    _write_queue.put_nowait((storage, trace))
+
+
+def _check_sample_rate(sample_rate: float) -> None:
+    if not 0.0 <= sample_rate <= 1.0:
+        raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate!r}")
+
+
+class _UnsampledCall:
+    """
+    Context manager around a call that sampling left out of the trace.
+    
+    Successful calls leave no trace; an exception is still recorded (errors
+    are always traced) and then propagates. Input is only captured on error.
+    Clears the context on exit, like the traced paths.
+    """
+    
+    __slots__ = ("_args", "_kwargs", "_metadata", "_start_ns")
+    
+    def __init__(
+        self,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        metadata: dict[str, Any],
+    ):
+        self._args = args
+        self._kwargs = kwargs
+        self._metadata = metadata
+        self._start_ns = 0
+    
+    def __enter__(self) -> "_UnsampledCall":
+        self._start_ns = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        try:
+            if isinstance(exc, Exception):
+                _save_trace(get_storage(), Trace(
+                    input=_capture_input(self._args, self._kwargs),
+                    output=None,
+                    context=get_context(),
+                    duration_ms=(time.perf_counter_ns() - self._start_ns) / 1e6,
+                    status="error",
+                    error=str(exc),
+                    metadata=self._metadata.copy(),
+                ))
+        finally:
+            clear_context()
+
+
+def _writer_loop() -> None:
+    """Drain the write queue in batches. Runs forever in a daemon thread."""
+    while True:
+        batch = [_write_queue.get()]
+        while len(batch) < _WRITER_BATCH_SIZE:
+            try:
+                batch.append(_write_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        try:
+            # Group by storage so each backend gets a single save_many() call
+            grouped: dict[int, tuple[BaseStorage, list[Trace]]] = {}
+            for storage, trace in batch:
+                grouped.setdefault(id(storage), (storage, []))[1].append(trace)
+            for storage, traces in grouped.values():
+                storage.save_many(traces)
+                storage.flush()
+        except Exception as e:
+            # Fail-safe: the writer thread must never die
+            _log_error(f"Background writer failed to save traces: {e}")
+        finally:
+            for _ in batch:
+                _write_queue.task_done()
 
 
 def monitor(
@@ -89,6 +337,7 @@ def monitor(
     *,
     name: Optional[str] = None,
     metadata: Optional[dict[str, Any]] = None,
+    sample_rate: float = 1.0,
 ) -> F | Callable[[F], F]:
     """
     Decorator to monitor a function and capture traces.
@@ -102,6 +351,9 @@ def monitor(
         func: The function to monitor (when used without parentheses).
         name: Optional name for the trace (defaults to function name).
         metadata: Optional static metadata to attach to all traces.
+        sample_rate: Fraction of successful calls to trace, between 0 and 1.
+            Calls that aren't sampled skip input capture and storage
+            entirely. Errors are always traced.
     
     Returns:
         The decorated function that captures traces.
@@ -124,130 +376,21 @@ def monitor(
         ...     await asyncio.sleep(0.1)
         ...     return "Async response"
     """
+    _check_sample_rate(sample_rate)
+    
     def decorator(fn: F) -> F:
         trace_name = name or fn.__name__
         
-        # Check if function is async
-        if inspect.iscoroutinefunction(fn):
-            @functools.wraps(fn)
-            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
-                storage = get_storage()
-                start_time = time.perf_counter()
-                
-                # Capture input
-                input_data = _capture_input(args, kwargs)
-                
-                # Get any context set by the user
-                context = get_context()
-                
-                # Prepare metadata
-                trace_metadata = metadata.copy() if metadata else {}
-                trace_metadata["function_name"] = trace_name
-                trace_metadata["is_async"] = True
-                
-                try:
-                    # Execute the async function
-                    result = await fn(*args, **kwargs)
-                    
-                    # Calculate duration
-                    duration_ms = (time.perf_counter() - start_time) * 1000
-                    
-                    # Create and save trace
-                    trace = Trace(
-                        input=input_data,
-                        output=result,
-                        context=context,
-                        duration_ms=duration_ms,
-                        status="success",
-                        metadata=trace_metadata,
-                    )
-                    storage.save(trace)
-                    
-                    return result
-                    
-                except Exception as e:
-                    # Calculate duration even on error
-                    duration_ms = (time.perf_counter() - start_time) * 1000
-                    
-                    # Create and save error trace
-                    trace = Trace(
-                        input=input_data,
-                        output=None,
-                        context=context,
-                        duration_ms=duration_ms,
-                        status="error",
-                        error=str(e),
-                        metadata=trace_metadata,
-                    )
-                    storage.save(trace)
-                    
-                    # Re-raise the exception
-                    raise
-                finally:
-                    # Clear context after each call
-                    clear_context()
-            
-            return async_wrapper  # type: ignore
-        else:
-            @functools.wraps(fn)
-            def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
-                storage = get_storage()
-                start_time = time.perf_counter()
-                
-                # Capture input
-                input_data = _capture_input(args, kwargs)
-                
-                # Get any context set by the user
-                context = get_context()
-                
-                # Prepare metadata
-                trace_metadata = metadata.copy() if metadata else {}
-                trace_metadata["function_name"] = trace_name
-                trace_metadata["is_async"] = False
-                
-                try:
-                    # Execute the function
-                    result = fn(*args, **kwargs)
-                    
-                    # Calculate duration
-                    duration_ms = (time.perf_counter() - start_time) * 1000
-                    
-                    # Create and save trace
-                    trace = Trace(
-                        input=input_data,
-                        output=result,
-                        context=context,
-                        duration_ms=duration_ms,
-                        status="success",
-                        metadata=trace_metadata,
-                    )
-                    storage.save(trace)
-                    
-                    return result
-                    
-                except Exception as e:
-                    # Calculate duration even on error
-                    duration_ms = (time.perf_counter() - start_time) * 1000
-                    
-                    # Create and save error trace
-                    trace = Trace(
-                        input=input_data,
-                        output=None,
-                        context=context,
-                        duration_ms=duration_ms,
-                        status="error",
-                        error=str(e),
-                        metadata=trace_metadata,
-                    )
-                    storage.save(trace)
-                    
-                    # Re-raise the exception
-                    raise
-                finally:
-                    # Clear context after each call
-                    clear_context()
-            
-            return sync_wrapper  # type: ignore
+        # Resolve everything that doesn't depend on the call arguments once,
+        # here, so each call only pays for the tracing itself
+        is_async = inspect.iscoroutinefunction(fn)
+        base_metadata = metadata.copy() if metadata else {}
+        base_metadata["function_name"] = trace_name
+        base_metadata["is_async"] = is_async
+        
+        if is_async:
+            return _async_monitor_wrapper(fn, base_metadata, sample_rate)  # type: ignore
+        return _sync_monitor_wrapper(fn, base_metadata, sample_rate)  # type: ignore
     
     # Handle both @monitor and @monitor() syntax
     if func is not None:
@@ -255,11 +398,163 @@ def monitor(
     return decorator
 
 
+def _sync_monitor_wrapper(
+    fn: Callable[..., Any],
+    base_metadata: dict[str, Any],
+    sample_rate: float = 1.0,
+) -> Callable[..., Any]:
+    """Build the tracing wrapper for a synchronous function."""
+    # Specialize per decorated function: bind the clock as a closure variable
+    # so each call skips the module attribute lookup
+    perf_counter_ns = time.perf_counter_ns
+    sampling = sample_rate < 1.0
+    rand = random.random
+    
+    @functools.wraps(fn)
+    def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+        if sampling and rand() >= sample_rate:
+            with _UnsampledCall(args, kwargs, base_metadata):
+                return fn(*args, **kwargs)
+        
+        storage = get_storage()
+        start_ns = perf_counter_ns()
+        
+        # Capture input
+        input_data = _capture_input(args, kwargs)
+        
+        # Get any context set by the user
+        context = get_context()
+        
+        # Each trace gets its own copy of the precomputed metadata
+        trace_metadata = base_metadata.copy()
+        
+        try:
+            # Execute the function
+            result = fn(*args, **kwargs)
+            
+            # Calculate duration
+            duration_ms = (perf_counter_ns() - start_ns) / 1e6
+            
+            # Create and save trace
+            trace = Trace(
+                input=input_data,
+                output=result,
+                context=context,
+                duration_ms=duration_ms,
+                status="success",
+                metadata=trace_metadata,
+            )
+            _save_trace(storage, trace)
+            
+            return result
+            
+        except Exception as e:
+            # Calculate duration even on error
+            duration_ms = (perf_counter_ns() - start_ns) / 1e6
+            
+            # Create and save error trace
+            trace = Trace(
+                input=input_data,
+                output=None,
+                context=context,
+                duration_ms=duration_ms,
+                status="error",
+                error=str(e),
+                metadata=trace_metadata,
+            )
+            _save_trace(storage, trace)
+            
+            # Re-raise the exception
+            raise
+        finally:
+            # Clear context after each call
+            clear_context()
+    
+    return sync_wrapper
+
+
+def _async_monitor_wrapper(
+    fn: Callable[..., Any],
+    base_metadata: dict[str, Any],
+    sample_rate: float = 1.0,
+) -> Callable[..., Any]:
+    """Build the tracing wrapper for a coroutine function."""
+    # Specialize per decorated function: bind the clock as a closure variable
+    # so each call skips the module attribute lookup
+    perf_counter_ns = time.perf_counter_ns
+    sampling = sample_rate < 1.0
+    rand = random.random
+    
+    @functools.wraps(fn)
+    async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+        if sampling and rand() >= sample_rate:
+            with _UnsampledCall(args, kwargs, base_metadata):
+                return await fn(*args, **kwargs)
+        
+        storage = get_storage()
+        start_ns = perf_counter_ns()
+        
+        # Capture input
+        input_data = _capture_input(args, kwargs)
+        
+        # Get any context set by the user
+        context = get_context()
+        
+        # Each trace gets its own copy of the precomputed metadata
+        trace_metadata = base_metadata.copy()
+        
+        try:
+            # Execute the async function
+            result = await fn(*args, **kwargs)
+            
+            # Calculate duration
+            duration_ms = (perf_counter_ns() - start_ns) / 1e6
+            
+            # Create and save trace
+            trace = Trace(
+                input=input_data,
+                output=result,
+                context=context,
+                duration_ms=duration_ms,
+                status="success",
+                metadata=trace_metadata,
+            )
+            _save_trace(storage, trace)
+            
+            return result
+            
+        except Exception as e:
+            # Calculate duration even on error
+            duration_ms = (perf_counter_ns() - start_ns) / 1e6
+            
+            # Create and save error trace
+            trace = Trace(
+                input=input_data,
+                output=None,
+                context=context,
+                duration_ms=duration_ms,
+                status="error",
+                error=str(e),
+                metadata=trace_metadata,
+            )
+            _save_trace(storage, trace)
+            
+            # Re-raise the exception
+            raise
+        finally:
+            # Clear context after each call
+            clear_context()
+    
+    return async_wrapper
+
+
 def wrap(
     agent: Any,
     *,
     name: Optional[str] = None,
     metadata: Optional[dict[str, Any]] = None,
+    stream_output: Literal["merge", "last"] = "merge",
+    sample_rate: float = 1.0,
 ) -> Any:
     """
     Wrap an agent object to capture traces from .invoke() and .stream() calls.
@@ -271,6 +566,13 @@ def wrap(
         agent: The agent object to wrap.
         name: Optional name for traces.
         metadata: Optional static metadata for traces.
+        stream_output: How .stream() output is recorded. "merge" (default)
+            keeps every chunk and merges dict chunks into one output. "last"
+            keeps only the most recent chunk, which is the complete state
+            for LangGraph's stream_mode="values" and needs constant memory
+            however long the stream runs.
+        sample_rate: Fraction of successful calls to trace, between 0 and 1.
+            Errors are always traced. See monitor().
     
     Returns:
         A wrapped agent that captures traces.
@@ -285,57 +587,108 @@ def wrap(
         >>> # Use as normal
         >>> result = monitored_agent.invoke({"messages": [...]})
     """
-    return _AgentWrapper(agent, name=name, metadata=metadata)
+    return _AgentWrapper(
+        agent,
+        name=name,
+        metadata=metadata,
+        stream_output=stream_output,
+        sample_rate=sample_rate,
+    )
 
 
 class _AgentWrapper:
     """Internal wrapper class for agent objects."""
     
+    # "__dict__" keeps arbitrary attribute assignment working and holds the
+    # agent methods bound in __init__
+    __slots__ = (
+        "_agent",
+        "_keep_last_chunk_only",
+        "_name",
+        "_metadata",
+        "_sample_rate",
+        "_method_metadata",
+        "__dict__",
+    )
+    
+    _TRACED_METHODS = frozenset(("invoke", "stream", "ainvoke"))
+    
     def __init__(
         self,
         agent: Any,
         name: Optional[str] = None,
         metadata: Optional[dict[str, Any]] = None,
+        stream_output: str = "merge",
+        sample_rate: float = 1.0,
     ):
+        if stream_output not in ("merge", "last"):
+            raise ValueError(
+                f"stream_output must be 'merge' or 'last', got {stream_output!r}"
+            )
+        _check_sample_rate(sample_rate)
         self._agent = agent
+        self._keep_last_chunk_only = stream_output == "last"
         self._name = name or getattr(agent, "name", agent.__class__.__name__)
         self._metadata = metadata or {}
+        self._sample_rate = sample_rate
+        
+        # Per-method metadata, built once; each trace gets a shallow copy
+        self._method_metadata = {
+            method: {**self._metadata, "agent_name": self._name, "method": method}
+            for method in ("invoke", "stream", "ainvoke")
+        }
+        
+        # Bind the agent's public methods once so frameworks probing them
+        # (get_graph, get_name, ...) skip the __getattr__ fallback. Lookups
+        # are static so properties on the agent aren't evaluated here.
+        for attr_name in dir(type(agent)):
+            if attr_name.startswith("_") or attr_name in self._TRACED_METHODS:
+                continue
+            try:
+                static = inspect.getattr_static(agent, attr_name)
+            except AttributeError:
+                continue
+            if inspect.isfunction(static):
+                self.__dict__[attr_name] = getattr(agent, attr_name)
+    
+    def _skip_sample(self) -> bool:
+        """Whether this call falls outside the configured sample."""
+        return self._sample_rate < 1.0 and random.random() >= self._sample_rate
     
     def invoke(self, input_data: Any, *args: Any, **kwargs: Any) -> Any:
         """Wrapped invoke method with trace capture."""
+        if self._skip_sample():
+            with _UnsampledCall((input_data,), {}, self._method_metadata["invoke"]):
+                return self._agent.invoke(input_data, *args, **kwargs)
+        
         storage = get_storage()
-        start_time = time.perf_counter()
+        start_ns = time.perf_counter_ns()
         context = get_context()
         
-        trace_metadata = self._metadata.copy()
-        trace_metadata["agent_name"] = self._name
-        trace_metadata["method"] = "invoke"
+        trace_metadata = self._method_metadata["invoke"].copy()
         
         try:
             result = self._agent.invoke(input_data, *args, **kwargs)
-            duration_ms = (time.perf_counter() - start_time) * 1000
-            
-            # Extract messages for LangGraph-style agents
-            processed_input = self._extract_messages(input_data, "input")
-            processed_output = self._extract_messages(result, "output")
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1e6
             
+            # LangGraph-style state dicts are recorded as-is
             trace = Trace(
-                input=processed_input,
-                output=processed_output,
+                input=input_data,
+                output=result,
                 context=context,
                 duration_ms=duration_ms,
                 status="success",
                 metadata=trace_metadata,
             )
-            storage.save(trace)
+            _save_trace(storage, trace)
             
             return result
             
         except Exception as e:
-            duration_ms = (time.perf_counter() - start_time) * 1000
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1e6
             
             trace = Trace(
-                input=self._extract_messages(input_data, "input"),
+                input=input_data,
                 output=None,
                 context=context,
                 duration_ms=duration_ms,
@@ -343,49 +696,57 @@ class _AgentWrapper:
                 error=str(e),
                 metadata=trace_metadata,
             )
-            storage.save(trace)
+            _save_trace(storage, trace)
             raise
         finally:
             clear_context()
     
     def stream(self, input_data: Any, *args: Any, **kwargs: Any) -> Any:
         """Wrapped stream method with trace capture."""
+        if self._skip_sample():
+            with _UnsampledCall((input_data,), {}, self._method_metadata["stream"]):
+                yield from self._agent.stream(input_data, *args, **kwargs)
+            return
+        
         storage = get_storage()
-        start_time = time.perf_counter()
+        start_ns = time.perf_counter_ns()
         context = get_context()
         
-        trace_metadata = self._metadata.copy()
-        trace_metadata["agent_name"] = self._name
-        trace_metadata["method"] = "stream"
+        trace_metadata = self._method_metadata["stream"].copy()
         
-        # Collect all streamed chunks
-        chunks = []
+        # Collect streamed chunks, or only the latest one when that's all
+        # the trace needs
+        chunks: list[Any] = []
+        keep_last_only = self._keep_last_chunk_only
         
         try:
             for chunk in self._agent.stream(input_data, *args, **kwargs):
-                chunks.append(chunk)
+                if keep_last_only:
+                    chunks[:] = (chunk,)
+                else:
+                    chunks.append(chunk)
                 yield chunk
             
-            duration_ms = (time.perf_counter() - start_time) * 1000
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1e6
             
             # Reconstruct final output from chunks
             final_output = self._reconstruct_from_chunks(chunks)
             
             trace = Trace(
-                input=self._extract_messages(input_data, "input"),
+                input=input_data,
                 output=final_output,
                 context=context,
                 duration_ms=duration_ms,
                 status="success",
                 metadata=trace_metadata,
             )
-            storage.save(trace)
+            _save_trace(storage, trace)
             
         except Exception as e:
-            duration_ms = (time.perf_counter() - start_time) * 1000
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1e6
             
             trace = Trace(
-                input=self._extract_messages(input_data, "input"),
+                input=input_data,
                 output={"partial_chunks": chunks} if chunks else None,
                 context=context,
                 duration_ms=duration_ms,
@@ -393,42 +754,44 @@ class _AgentWrapper:
                 error=str(e),
                 metadata=trace_metadata,
             )
-            storage.save(trace)
+            _save_trace(storage, trace)
             raise
         finally:
             clear_context()
     
     async def ainvoke(self, input_data: Any, *args: Any, **kwargs: Any) -> Any:
         """Wrapped async invoke method with trace capture."""
+        if self._skip_sample():
+            with _UnsampledCall((input_data,), {}, self._method_metadata["ainvoke"]):
+                return await self._agent.ainvoke(input_data, *args, **kwargs)
+        
         storage = get_storage()
-        start_time = time.perf_counter()
+        start_ns = time.perf_counter_ns()
         context = get_context()
         
-        trace_metadata = self._metadata.copy()
-        trace_metadata["agent_name"] = self._name
-        trace_metadata["method"] = "ainvoke"
+        trace_metadata = self._method_metadata["ainvoke"].copy()
         
         try:
             result = await self._agent.ainvoke(input_data, *args, **kwargs)
-            duration_ms = (time.perf_counter() - start_time) * 1000
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1e6
             
             trace = Trace(
-                input=self._extract_messages(input_data, "input"),
-                output=self._extract_messages(result, "output"),
+                input=input_data,
+                output=result,
                 context=context,
                 duration_ms=duration_ms,
                 status="success",
                 metadata=trace_metadata,
             )
-            storage.save(trace)
+            _save_trace(storage, trace)
             
             return result
             
         except Exception as e:
-            duration_ms = (time.perf_counter() - start_time) * 1000
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1e6
             
             trace = Trace(
-                input=self._extract_messages(input_data, "input"),
+                input=input_data,
                 output=None,
                 context=context,
                 duration_ms=duration_ms,
@@ -436,17 +799,11 @@ class _AgentWrapper:
                 error=str(e),
                 metadata=trace_metadata,
             )
-            storage.save(trace)
+            _save_trace(storage, trace)
             raise
         finally:
             clear_context()
     
-    def _extract_messages(self, data: Any, direction: str) -> Any:
-        """Extract messages from LangGraph-style state dicts."""
-        if isinstance(data, dict) and "messages" in data:
-            return data
-        return data
-    
     def _reconstruct_from_chunks(self, chunks: list[Any]) -> Any:
         """Reconstruct the final output from streamed chunks."""
         if not chunks:
@@ -456,27 +813,24 @@ class _AgentWrapper:
         # Try to get a meaningful representation
         last_chunk = chunks[-1]
         
-        # If chunks are dicts with messages, try to merge them
-        if all(isinstance(c, dict) for c in chunks):
-            merged = {}
-            for chunk in chunks:
-                for key, value in chunk.items():
-                    if key not in merged:
-                        # Copy the value if it's a list to avoid modifying the original chunk
-                        if isinstance(value, list):
-                            merged[key] = list(value)
-                        else:
-                            merged[key] = value
-                    elif isinstance(value, list) and isinstance(merged[key], list):
-                        merged[key].extend(value)
-                    else:
-                        merged[key] = value
-            return merged
-        
-        return last_chunk
+        # If chunks are dicts with messages, merge them in a single pass
+        merged: dict[Any, Any] = {}
+        for chunk in chunks:
+            if not isinstance(chunk, dict):
+                return last_chunk
+            for key, value in chunk.items():
+                current = merged.get(key)
+                if isinstance(value, list) and isinstance(current, list):
+                    current.extend(value)
+                elif isinstance(value, list):
+                    # Copy the list to avoid modifying the original chunk
+                    merged[key] = list(value)
+                else:
+                    merged[key] = value
+        return merged
     
     def __getattr__(self, name: str) -> Any:
-        """Proxy all other attributes to the wrapped agent."""
+        """Proxy attributes not bound in __init__ to the wrapped agent."""
         return getattr(self._agent, name)
 
 
@@ -489,6 +843,7 @@ def log(
     status: str = "success",
     error: Optional[str] = None,
     duration_ms: Optional[float] = None,
+    sample_rate: float = 1.0,
 ) -> Trace:
     """
     Manually log a trace.
@@ -504,6 +859,8 @@ def log(
         status: "success" or "error".
         error: Error message if status is "error".
         duration_ms: Execution duration in milliseconds.
+        sample_rate: Probability of storing a trace whose status isn't
+            "error". The Trace is returned either way.
     
     Returns:
         The created Trace object.
@@ -519,7 +876,7 @@ def log(
         ...     metadata={"user_id": "123"},
         ... )
     """
-    storage = get_storage()
+    _check_sample_rate(sample_rate)
     
     trace = Trace(
         input=input_data,
@@ -531,7 +888,8 @@ def log(
         metadata=metadata or {},
     )
     
-    storage.save(trace)
+    if status == "error" or sample_rate >= 1.0 or random.random() < sample_rate:
+        _save_trace(get_storage(), trace)
     return trace
 
 
@@ -544,13 +902,13 @@ def _capture_input(args: tuple, kwargs: dict) -> Any:
     - Multiple args: return as list
     - Mixed: return as dict with args and kwargs
     """
-    if not args and not kwargs:
-        return None
-    
-    if len(args) == 1 and not kwargs:
-        return args[0]
-    
-    if not args and kwargs:
+    # Ordered so the common single-argument call takes the fewest checks
+    if not kwargs:
+        if len(args) == 1:
+            return args[0]
+        if not args:
+            return None
+    elif not args:
         return kwargs
     
     return {
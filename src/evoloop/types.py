@@ -9,8 +9,10 @@ from datetime import datetime
 from typing import Any, Optional
 from uuid import uuid4
 
+from evoloop._serialize import to_json_compatible
 
-@dataclass
+
+@dataclass(slots=True)
 class TraceContext:
     """
     Additional context captured alongside the trace.
@@ -39,7 +41,7 @@ class TraceContext:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Trace:
     """
     Represents a single interaction trace from an agent.
@@ -52,7 +54,7 @@ class Trace:
         input: The input provided to the agent (user message, query, etc.).
         output: The output produced by the agent (response, action, etc.).
         context: Optional contextual data available during execution.
-        timestamp: When this trace was captured.
+        timestamp: When this trace was captured (ISO-8601).
         duration_ms: How long the execution took in milliseconds.
         status: Whether the execution succeeded or failed.
         error: Error message if status is "error".
@@ -69,7 +71,14 @@ class Trace:
     metadata: dict[str, Any] = field(default_factory=dict)
 
     def to_dict(self) -> dict[str, Any]:
-        """Convert trace to a dictionary for storage."""
+        """
+        Convert trace to a dictionary for storage.
+        
+        Input and output containers that are already JSON-compatible are
+        returned as-is, not copied, and metadata is never copied. The result
+        therefore shares those objects with the trace; copy it before
+        mutating.
+        """
         return {
             "id": self.id,
             "input": self._serialize(self.input),
@@ -90,7 +99,7 @@ class Trace:
             input=d.get("input"),
             output=d.get("output"),
             context=TraceContext.from_dict(d["context"]) if d.get("context") else None,
-            timestamp=d.get("timestamp", datetime.now().isoformat()),
+            timestamp=d.get("timestamp") or datetime.now().isoformat(),
             duration_ms=d.get("duration_ms"),
             status=d.get("status", "success"),
             error=d.get("error"),
@@ -103,36 +112,6 @@ class Trace:
         Serialize complex objects to JSON-compatible format.
         
         Handles LangChain messages, Pydantic models, and other common types.
+        See evoloop._serialize, which can be compiled with mypyc.
         """
-        # Handle None
-        if obj is None:
-            return None
-        
-        # Handle basic types
-        if isinstance(obj, (str, int, float, bool)):
-            return obj
-        
-        # Handle lists
-        if isinstance(obj, list):
-            return [Trace._serialize(item) for item in obj]
-        
-        # Handle dicts
-        if isinstance(obj, dict):
-            return {k: Trace._serialize(v) for k, v in obj.items()}
-        
-        # Handle LangChain BaseMessage (duck typing to avoid import)
-        if hasattr(obj, "content") and hasattr(obj, "type"):
-            return {
-                "type": getattr(obj, "type", obj.__class__.__name__),
-                "content": obj.content,
-                "additional_kwargs": getattr(obj, "additional_kwargs", {}),
-            }
-        
-        # Handle Pydantic models
-        if hasattr(obj, "model_dump"):
-            return obj.model_dump()
-        if hasattr(obj, "dict"):
-            return obj.dict()
-        
-        # Fallback to string representation
-        return str(obj)
+        return to_json_compatible(obj)
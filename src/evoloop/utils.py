@@ -7,7 +7,30 @@ Provides robust serialization and other helper functions.
 import json
 from datetime import datetime, date
 from uuid import UUID
-from typing import Any
+from typing import Any, Callable
+
+
+def _isoformat(obj: Any) -> Any:
+    return obj.isoformat()
+
+
+def _decode_bytes(obj: bytes) -> str:
+    try:
+        return obj.decode('utf-8')
+    except UnicodeDecodeError:
+        return f"<bytes: {len(obj)} bytes>"
+
+
+# Exact types handled with a single dict lookup; subclasses and everything
+# else go through the checks in SafeEncoder.default
+_EXACT_TYPE_HANDLERS: dict[type, Callable[[Any], Any]] = {
+    datetime: _isoformat,
+    date: _isoformat,
+    UUID: str,
+    bytes: _decode_bytes,
+    set: list,
+    frozenset: list,
+}
 
 
 class SafeEncoder(json.JSONEncoder):
@@ -27,6 +50,10 @@ class SafeEncoder(json.JSONEncoder):
     """
     
     def default(self, obj: Any) -> Any:
+        handler = _EXACT_TYPE_HANDLERS.get(type(obj))
+        if handler is not None:
+            return handler(obj)
+        
         # Handle datetime/date
         if isinstance(obj, (datetime, date)):
             return obj.isoformat()
@@ -37,10 +64,7 @@ class SafeEncoder(json.JSONEncoder):
         
         # Handle bytes
         if isinstance(obj, bytes):
-            try:
-                return obj.decode('utf-8')
-            except UnicodeDecodeError:
-                return f"<bytes: {len(obj)} bytes>"
+            return _decode_bytes(obj)
         
         # Handle sets and frozensets
         if isinstance(obj, (set, frozenset)):
@@ -104,6 +128,11 @@ class SafeEncoder(json.JSONEncoder):
             return f"<unserializable: {type(obj).__name__}>"
 
 
+# One shared encoder serves every call: json.dumps(cls=SafeEncoder) would
+# build a new instance each time
+_SAFE_ENCODER = SafeEncoder(ensure_ascii=False)
+
+
 def safe_serialize(obj: Any) -> str:
     """
     Safely serialize any object to a JSON string.
@@ -118,7 +147,7 @@ def safe_serialize(obj: Any) -> str:
         A JSON string representation of the object.
     """
     try:
-        return json.dumps(obj, cls=SafeEncoder, ensure_ascii=False)
+        return _SAFE_ENCODER.encode(obj)
     except Exception:
         # Ultimate fallback - should never happen, but just in case
         try:
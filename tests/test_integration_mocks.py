@@ -54,3 +54,47 @@ def test_wrap_langgraph_stream():
     assert trace.input == {"input": "stream_test"}
     # Stream output is captured as a list of chunks
     assert trace.output == {"messages": ["chunk1", "chunk2"]}
+
+def test_wrap_stream_keep_last_chunk():
+    """stream_output="last" records only the final chunk."""
+    agent = MockLangGraphAgent()
+    monitored_agent = wrap(agent, name="mock_agent_last", stream_output="last")
+    
+    chunks = list(monitored_agent.stream({"input": "last_test"}))
+    assert chunks == [{"messages": ["chunk1"]}, {"messages": ["chunk2"]}]
+    
+    trace = get_storage().list_traces(limit=1)[0]
+    assert trace.input == {"input": "last_test"}
+    assert trace.output == {"messages": ["chunk2"]}
+
+def test_wrap_rejects_unknown_stream_output():
+    with pytest.raises(ValueError):
+        wrap(MockLangGraphAgent(), stream_output="all")
+
+def test_wrap_allows_setting_attributes():
+    """Attributes can still be set on the wrapper and read back."""
+    agent = MockLangGraphAgent()
+    monitored_agent = wrap(agent, name="mock_agent_attrs")
+    
+    monitored_agent.config = {"recursion_limit": 5}
+    assert monitored_agent.config == {"recursion_limit": 5}
+    assert monitored_agent.invoke({"input": "x"}) == {"messages": [{"content": "Mock response"}]}
+
+def test_wrap_binds_agent_methods():
+    """Public agent methods are bound on the wrapper, not proxied per access."""
+    class GraphAgent(MockLangGraphAgent):
+        name = "graph"
+        
+        def get_graph(self):
+            return "graph"
+        
+        @property
+        def config_schema(self):
+            raise RuntimeError("properties must not be evaluated when wrapping")
+    
+    monitored_agent = wrap(GraphAgent())
+    
+    assert "get_graph" in vars(monitored_agent)
+    assert monitored_agent.get_graph() == "graph"
+    assert monitored_agent.name == "graph"
+    assert "config_schema" not in vars(monitored_agent)
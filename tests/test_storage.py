@@ -3,9 +3,13 @@ Tests for the storage module.
 """
 
 import os
+import sqlite3
 import tempfile
+import threading
+import time
+from datetime import date
 import pytest
-from evoloop.storage import SQLiteStorage
+from evoloop.storage import SQLiteStorage, _flush_open_storages
 from evoloop.types import Trace, TraceContext
 
 
@@ -77,6 +81,23 @@ class TestSQLiteStorage:
         assert len(success_traces) == 2
         assert len(error_traces) == 1
 
+    def test_list_traces_keyset_pagination(self, storage):
+        # Shared timestamps force the id tie-breaker to keep pages disjoint
+        for i in range(7):
+            storage.save(Trace(input=i, output=i, timestamp=f"2024-01-01T00:00:0{i // 2}"))
+        
+        seen = []
+        page = storage.list_traces(limit=3)
+        while page:
+            seen.extend(t.id for t in page)
+            last = page[-1]
+            page = storage.list_traces(
+                limit=3, before_timestamp=last.timestamp, before_id=last.id
+            )
+        
+        assert seen == [t.id for t in storage.list_traces(limit=10)]
+        assert len(set(seen)) == 7
+
     def test_count(self, storage):
         assert storage.count() == 0
         
@@ -88,12 +109,36 @@ class TestSQLiteStorage:
         assert storage.count(status="success") == 2
         assert storage.count(status="error") == 1
 
+    def test_load_many(self, storage, monkeypatch):
+        from evoloop import storage as storage_module
+        monkeypatch.setattr(storage_module, "_LOAD_MANY_CHUNK", 2)
+        
+        traces = [Trace(input=f"in-{i}", output=f"out-{i}") for i in range(5)]
+        storage.save_many(traces)
+        
+        ids = [t.id for t in traces] + [traces[0].id, "missing"]
+        loaded = storage.load_many(ids)
+        
+        assert set(loaded) == {t.id for t in traces}
+        assert loaded[traces[3].id].input == "in-3"
+        assert storage.load_many([]) == {}
+
+    def test_count_by_status(self, storage):
+        assert storage.count_by_status() == {}
+        
+        storage.save(Trace(input="1", output="1"))
+        storage.save(Trace(input="2", output="2"))
+        storage.save(Trace(input="3", output=None, status="error"))
+        
+        assert storage.count_by_status() == {"success": 2, "error": 1}
+
     def test_iter_traces(self, storage):
         for i in range(3):
             storage.save(Trace(input=f"in-{i}", output=f"out-{i}"))
         
         traces = list(storage.iter_traces())
         assert len(traces) == 3
+        assert [t.id for t in storage.iter_traces(batch_size=2)] == [t.id for t in traces]
 
     def test_clear(self, storage):
         storage.save(Trace(input="1", output="1"))
@@ -114,3 +159,285 @@ class TestSQLiteStorage:
         loaded = storage.load(trace.id)
         assert loaded.input["messages"][0]["content"] == "hello"
         assert loaded.output["messages"][0]["content"] == "hi"
+
+    def test_batched_writes(self, storage):
+        """Buffered traces are written once the batch fills or on read."""
+        batched = SQLiteStorage(db_path=str(storage.db_path), batch_size=3)
+        batched.save(Trace(input="1", output="1"))
+        batched.save(Trace(input="2", output="2"))
+        assert storage.count() == 0
+        
+        batched.save(Trace(input="3", output="3"))
+        assert storage.count() == 3
+        
+        batched.save(Trace(input="4", output="4"))
+        assert batched.count() == 4
+        batched.close()
+
+    def test_batched_writes_flush_after_interval(self, storage):
+        """A partial batch is written once flush_interval has passed."""
+        batched = SQLiteStorage(
+            db_path=str(storage.db_path), batch_size=100, flush_interval=0.05
+        )
+        batched.save(Trace(input="1", output="1"))
+        
+        deadline = time.monotonic() + 2
+        while storage.count() == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert storage.count() == 1
+        batched.close()
+
+    def test_pending_traces_flushed_at_exit(self, storage):
+        batched = SQLiteStorage(
+            db_path=str(storage.db_path), batch_size=100, flush_interval=60
+        )
+        batched.save(Trace(input="1", output="1"))
+        assert storage.count() == 0
+        
+        _flush_open_storages()
+        assert storage.count() == 1
+        batched.close()
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+    def test_forked_child_gets_fresh_state(self, tmp_path):
+        """A child forked while a parent thread holds the lock can still write."""
+        path = tmp_path / "fork.db"
+        storage = SQLiteStorage(db_path=str(path), batch_size=100, flush_interval=0.05)
+        storage.save(Trace(input="parent", output="ok"))
+        storage._get_connection()
+        
+        held = threading.Event()
+        release = threading.Event()
+        
+        def hold_lock():
+            with storage._lock:
+                held.set()
+                release.wait()
+        
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        held.wait()
+        
+        pid = os.fork()
+        if pid == 0:
+            ok = False
+            try:
+                child = Trace(input="child", output="ok")
+                storage.save(child)
+                time.sleep(0.5)  # let the child's own flush timer fire
+                conn = sqlite3.connect(path)
+                ok = conn.execute(
+                    "SELECT count(*) FROM traces WHERE id = ?", (child.id,)
+                ).fetchone()[0] == 1
+                conn.close()
+            finally:
+                os._exit(0 if ok else 1)
+        
+        release.set()
+        holder.join()
+        deadline = time.monotonic() + 10
+        while True:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            if time.monotonic() > deadline:
+                os.kill(pid, 9)
+                os.waitpid(pid, 0)
+                pytest.fail("forked child deadlocked")
+            time.sleep(0.01)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+        
+        storage.flush()
+        assert storage.count() == 2
+        storage.close()
+
+    def test_connection_pragmas(self, storage):
+        conn = storage._get_connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        # NORMAL == 1
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+    def test_invalid_sync_mode(self, storage):
+        with pytest.raises(ValueError):
+            SQLiteStorage(db_path=str(storage.db_path), sync_mode="fast")
+
+    def test_concurrent_saves(self, storage):
+        """Saves from many threads share one connection safely."""
+        def worker(n):
+            for i in range(20):
+                storage.save(Trace(input=f"{n}-{i}", output="ok"))
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert storage.count() == 100
+
+    def test_save_non_json_types(self, storage):
+        """Values JSON can't represent natively are stored, not dropped."""
+        trace = Trace(
+            input={1: "int key", "big": 2**70},
+            output="ok",
+            metadata={"when": date(2024, 1, 2)},
+        )
+        storage.save(trace)
+        
+        loaded = storage.load(trace.id)
+        assert loaded is not None
+        assert loaded.input["big"] == 2**70
+        assert loaded.metadata["when"] == "2024-01-02"
+
+    def test_save_many(self, storage):
+        traces = [Trace(input=f"in-{i}", output=f"out-{i}") for i in range(50)]
+        storage.save_many(traces)
+        
+        assert storage.count() == 50
+        assert storage.load(traces[10].id).input == "in-10"
+
+    def test_save_many_skips_bad_rows(self, storage):
+        """A row the database rejects doesn't drop the rest of the batch."""
+        good = [Trace(input=f"in-{i}", output="ok") for i in range(3)]
+        bad = Trace(input="bad", output="ok", duration_ms=object())  # unbindable
+        storage.save_many([good[0], bad, good[1], good[2]])
+        
+        assert storage.count() == 3
+        assert storage.load(bad.id) is None
+        assert storage.load(good[2].id) is not None
+
+    def test_load_text_encoded_rows(self, storage):
+        """Rows written as TEXT (older databases) still load."""
+        conn = storage._get_connection()
+        conn.execute(
+            "INSERT INTO traces (id, input, output, timestamp, status, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ("legacy", '{"q": "hi"}', '"hello"', "2025-01-01T00:00:00", "success", '{"v": 1}'),
+        )
+        conn.commit()
+        
+        loaded = storage.load("legacy")
+        assert loaded.input == {"q": "hi"}
+        assert loaded.output == "hello"
+        assert loaded.metadata == {"v": 1}
+
+    def test_payloads_stored_as_text(self, storage):
+        """Payload columns hold TEXT whether or not orjson is installed."""
+        trace = Trace(
+            input={"q": "hi"},
+            output="hello",
+            context=TraceContext(data={"k": 1}),
+            metadata={"v": 1},
+        )
+        storage.save(trace)
+        
+        types = storage._get_connection().execute(
+            "SELECT typeof(input), typeof(output), typeof(context), typeof(metadata) "
+            "FROM traces WHERE id = ?",
+            (trace.id,),
+        ).fetchone()
+        assert types == ("text", "text", "text", "text")
+        assert storage.list_traces(status="success")[0].input == {"q": "hi"}
+
+    def test_load_blob_encoded_rows(self, storage):
+        """BLOB rows written by earlier versions load next to TEXT rows."""
+        conn = storage._get_connection()
+        conn.execute(
+            "INSERT INTO traces (id, input, output, timestamp, status, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ("blob", b'{"q": "hi"}', b'"hello"', "2025-01-01T00:00:00", "success", b'{"v": 1}'),
+        )
+        conn.commit()
+        storage.save(Trace(input={"q": "new"}, output="ok"))
+        
+        loaded = storage.load("blob")
+        assert loaded.input == {"q": "hi"}
+        assert loaded.output == "hello"
+        assert loaded.metadata == {"v": 1}
+        assert [t.input for t in storage.list_traces()] == [{"q": "new"}, {"q": "hi"}]
+
+    def test_schema_bootstrap_upgrades_old_database(self, tmp_path):
+        """Databases without a schema version get the current indexes once."""
+        path = tmp_path / "old.db"
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE traces (id TEXT PRIMARY KEY, input TEXT NOT NULL, "
+            "output TEXT NOT NULL, context TEXT, timestamp TEXT NOT NULL, "
+            "duration_ms REAL, status TEXT NOT NULL DEFAULT 'success', "
+            "error TEXT, metadata TEXT)"
+        )
+        conn.execute("CREATE INDEX idx_traces_status ON traces(status)")
+        conn.commit()
+        conn.close()
+        
+        storage = SQLiteStorage(db_path=str(path))
+        indexes = {
+            row[0] for row in storage._get_connection().execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        assert "idx_traces_status_timestamp" in indexes
+        assert "idx_traces_status" not in indexes
+        assert storage._get_connection().execute("PRAGMA user_version").fetchone()[0] >= 1
+        storage.close()
+
+    def test_schema_created_when_user_version_already_set(self, tmp_path):
+        """A database whose user_version was set by someone else still gets the table."""
+        path = tmp_path / "shared.db"
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA user_version = 7")
+        conn.close()
+        
+        storage = SQLiteStorage(db_path=str(path))
+        trace = Trace(input="in", output="out")
+        storage.save(trace)
+        assert storage.load(trace.id) is not None
+        storage.close()
+
+    def test_dropped_table_recreated_on_open(self, tmp_path):
+        path = tmp_path / "dropped.db"
+        SQLiteStorage(db_path=str(path)).close()
+        conn = sqlite3.connect(path)
+        conn.execute("DROP TABLE traces")
+        conn.close()
+        
+        storage = SQLiteStorage(db_path=str(path))
+        storage.save(Trace(input="in", output="out"))
+        assert storage.count() == 1
+        indexes = {
+            row[0] for row in storage._get_connection().execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        assert {"idx_traces_timestamp", "idx_traces_status_timestamp"} <= indexes
+        storage.close()
+
+    def test_failed_schema_bootstrap_rolls_back(self, tmp_path):
+        """A schema script that fails midway doesn't leave a transaction open."""
+        path = tmp_path / "conflict.db"
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE idx_traces_status_timestamp (x)")
+        conn.commit()
+        conn.close()
+        
+        storage = SQLiteStorage(db_path=str(path))
+        assert not storage._get_connection().in_transaction
+        storage.close()
+
+
+class TestLogError:
+    """Tests for fail-safe error reporting."""
+
+    def test_warnings_are_rate_limited(self, capsys, monkeypatch):
+        from evoloop import storage as storage_module
+        monkeypatch.setattr(storage_module, "_DEBUG", False)
+        monkeypatch.setattr(storage_module, "_last_error_time", float("-inf"))
+        monkeypatch.setattr(storage_module, "_suppressed_errors", 0)
+        
+        for i in range(5):
+            storage_module._log_error(f"failure {i}")
+        assert capsys.readouterr().err == "[EvoLoop Warning] failure 0\n"
+        
+        monkeypatch.setattr(storage_module, "_last_error_time", float("-inf"))
+        storage_module._log_error("failure 5")
+        assert "(4 earlier warnings suppressed)" in capsys.readouterr().err
@@ -2,10 +2,23 @@
 Tests for the tracker module.
 """
 
+import asyncio
 import os
 import tempfile
+import threading
 import pytest
-from evoloop.tracker import monitor, log, get_storage, set_storage, set_context, clear_context
+from evoloop.tracker import (
+    monitor,
+    log,
+    get_storage,
+    set_storage,
+    set_context,
+    clear_context,
+    set_background_writes,
+    flush,
+    get_dropped_count,
+)
+from evoloop import tracker
 from evoloop.storage import SQLiteStorage
 from evoloop.types import TraceContext
 
@@ -107,6 +120,96 @@ class TestMonitorDecorator:
         assert traces[0].context.data["api_balance"] == 1000
 
 
+    async def test_monitor_async_function(self):
+        @monitor(name="async_agent", metadata={"version": "2.0"})
+        async def my_async_agent(query: str) -> str:
+            return f"async: {query}"
+        
+        result = await my_async_agent("hi")
+        assert result == "async: hi"
+        assert my_async_agent.__name__ == "my_async_agent"
+        
+        storage = get_storage()
+        traces = storage.list_traces()
+        assert len(traces) == 1
+        assert traces[0].output == "async: hi"
+        assert traces[0].metadata == {
+            "version": "2.0",
+            "function_name": "async_agent",
+            "is_async": True,
+        }
+
+    async def test_monitor_concurrent_async_calls(self):
+        """Overlapping async calls each get their own trace and context."""
+        @monitor
+        async def slow_agent(query: str) -> str:
+            await asyncio.sleep(0.05)
+            return f"done: {query}"
+        
+        async def with_context(query: str) -> str:
+            set_context(TraceContext(data={"query": query}))
+            return await slow_agent(query)
+        
+        @monitor
+        async def failing_agent(query: str) -> str:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+        
+        ok, err = await asyncio.gather(
+            with_context("a"),
+            failing_agent("b"),
+            return_exceptions=True,
+        )
+        assert ok == "done: a"
+        assert isinstance(err, RuntimeError)
+        
+        storage = get_storage()
+        assert storage.count(status="success") == 1
+        assert storage.count(status="error") == 1
+        success = storage.list_traces(status="success")[0]
+        assert success.context.data == {"query": "a"}
+
+    def test_monitor_sample_rate_always_traces_errors(self):
+        @monitor(sample_rate=0.0)
+        def sometimes_fails(fail: bool) -> str:
+            if fail:
+                raise ValueError("bad input")
+            return "ok"
+        
+        for _ in range(5):
+            assert sometimes_fails(False) == "ok"
+        with pytest.raises(ValueError):
+            sometimes_fails(True)
+        
+        traces = get_storage().list_traces()
+        assert len(traces) == 1
+        assert traces[0].status == "error"
+        assert traces[0].input is True
+        assert traces[0].metadata["function_name"] == "sometimes_fails"
+
+    def test_monitor_rejects_invalid_sample_rate(self):
+        with pytest.raises(ValueError):
+            monitor(sample_rate=1.5)
+
+    def test_default_storage_shared_across_threads(self, tmp_path, monkeypatch):
+        """Threads without set_storage() share one default storage per path."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(tracker, "_default_storages", {})
+        found = []
+        
+        def worker():
+            found.append(get_storage())
+        
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert len({id(s) for s in found}) == 1
+        found[0].close()
+
+
 class TestLogFunction:
     """Tests for the log() function."""
 
@@ -156,3 +259,82 @@ class TestLogFunction:
         
         assert trace.status == "error"
         assert trace.error == "Failed to process"
+
+    def test_log_sample_rate(self):
+        skipped = log(input_data="q", output_data="a", sample_rate=0.0)
+        log(input_data="q", output_data=None, status="error", sample_rate=0.0)
+        
+        assert skipped.input == "q"
+        assert get_storage().count() == 1
+        
+        with pytest.raises(ValueError):
+            log(input_data="q", output_data="a", sample_rate=-0.1)
+
+
+class TestBackgroundWrites:
+    """Tests for the background write-behind queue."""
+
+    @pytest.fixture(autouse=True)
+    def setup_storage(self):
+        """Use a temporary storage and enable background writes."""
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        storage = SQLiteStorage(db_path=path)
+        set_storage(storage)
+        set_background_writes(True)
+        yield
+        set_background_writes(False)
+        flush()
+        storage.close()
+        os.unlink(path)
+
+    def test_traces_persisted_after_flush(self):
+        @monitor
+        def echo(msg: str) -> str:
+            return msg
+        
+        for i in range(10):
+            echo(f"msg-{i}")
+        log(input_data="in", output_data="out")
+        
+        flush()
+        assert get_storage().count() == 11
+
+    def test_sheds_load_when_queue_saturated(self, monkeypatch):
+        monkeypatch.setattr(tracker, "_QUEUE_HIGH_WATER", -1)
+        monkeypatch.setattr(tracker, "_overload_sample_rate", 0.0)
+        before = get_dropped_count()
+        
+        for i in range(5):
+            log(input_data=i, output_data=i)
+        
+        flush()
+        assert get_dropped_count() - before == 5
+        assert get_storage().count() == 0
+
+    def test_writer_restarts_after_fork(self):
+        """A forked child drops inherited writer state and starts its own."""
+        tracker._reset_writer_after_fork()
+        assert tracker._writer_thread is None
+        
+        log(input_data="child", output_data="out")
+        assert tracker._writer_thread.is_alive()
+        
+        flush()
+        assert get_storage().count() == 1
+
+    def test_flush_covers_storages_from_other_threads(self, tmp_path):
+        other = SQLiteStorage(db_path=str(tmp_path / "other.db"), batch_size=100, flush_interval=60)
+        
+        def worker():
+            set_storage(other)
+            log(input_data="elsewhere", output_data="out")
+        
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        
+        flush()
+        assert len(other._pending) == 0
+        assert other.count() == 1
+        other.close()
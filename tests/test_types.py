@@ -2,7 +2,10 @@
 Tests for the types module.
 """
 
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
 import pytest
+from evoloop import _serialize
 from evoloop.types import Trace, TraceContext
 
 
@@ -33,6 +36,10 @@ class TestTraceContext:
         assert ctx.data == {"key": "value"}
         assert ctx.source == "test"
 
+    def test_context_has_no_instance_dict(self):
+        ctx = TraceContext(data={"a": 1})
+        assert not hasattr(ctx, "__dict__")
+
 
 class TestTrace:
     """Tests for Trace dataclass."""
@@ -45,6 +52,37 @@ class TestTrace:
         assert trace.id is not None
         assert trace.timestamp is not None
 
+    def test_timestamp_is_iso_format(self):
+        trace = Trace(input="a", output="b")
+        parsed = datetime.fromisoformat(trace.timestamp)
+        assert abs((datetime.now() - parsed).total_seconds()) < 5
+        assert Trace(input="a", output="b", timestamp="2025-01-01T00:00:00").timestamp == "2025-01-01T00:00:00"
+
+    def test_fields_match_public_attributes(self):
+        trace = Trace(input="a", output="b")
+        names = [f.name for f in fields(Trace)]
+        assert names == [
+            "input", "output", "id", "context", "timestamp",
+            "duration_ms", "status", "error", "metadata",
+        ]
+        assert isinstance(asdict(trace)["timestamp"], str)
+
+    def test_trace_has_no_instance_dict(self):
+        trace = Trace(input="a", output="b")
+        assert not hasattr(trace, "__dict__")
+        with pytest.raises(AttributeError):
+            trace.extra = 1
+
+    def test_slotted_trace_round_trips(self):
+        trace = Trace(
+            input={"q": "hi"},
+            output="hello",
+            context=TraceContext(data={"k": 1}, source="api"),
+            duration_ms=1.5,
+            metadata={"v": 1},
+        )
+        assert Trace.from_dict(trace.to_dict()) == trace
+
     def test_create_trace_with_all_fields(self):
         ctx = TraceContext(data={"test": True})
         trace = Trace(
@@ -70,6 +108,14 @@ class TestTrace:
         assert "id" in d
         assert "timestamp" in d
 
+    def test_to_dict_shares_json_containers(self):
+        """JSON-compatible containers are returned without copying."""
+        payload = {"messages": [{"role": "user", "content": "hi"}]}
+        trace = Trace(input=payload, output=None, metadata={"v": 1})
+        d = trace.to_dict()
+        assert d["input"] is payload
+        assert d["metadata"] is trace.metadata
+
     def test_from_dict(self):
         d = {
             "id": "test-id",
@@ -94,3 +140,49 @@ class TestTrace:
         d = trace.to_dict()
         assert d["input"] == [1, 2, 3]
         assert d["output"] == ["a", "b", "c"]
+
+    def test_serialize_dataclass(self):
+        @dataclass
+        class Point:
+            x: int
+            label: str
+        
+        trace = Trace(input=[Point(1, "a"), Point(2, "b")], output=None)
+        d = trace.to_dict()
+        assert d["input"] == [{"x": 1, "label": "a"}, {"x": 2, "label": "b"}]
+
+    def test_serialize_reuses_json_compatible_containers(self):
+        @dataclass
+        class Point:
+            x: int
+        
+        plain = {"messages": [{"role": "user", "content": "hi"}], "n": 1}
+        assert Trace._serialize(plain) is plain
+        
+        mixed = {"a": 1, "p": Point(2), "b": [3]}
+        converted = Trace._serialize(mixed)
+        assert converted == {"a": 1, "p": {"x": 2}, "b": [3]}
+        assert list(converted) == ["a", "p", "b"]
+        assert mixed["p"] == Point(2)
+
+    def test_serialize_self_referencing_dataclass(self):
+        @dataclass
+        class Node:
+            name: str
+            parent: "Node | None" = None
+        
+        node = Node("root")
+        node.parent = node
+        
+        d = Trace(input=node, output=None).to_dict()
+        assert isinstance(d["input"], str)
+        assert "root" in d["input"]
+
+    def test_type_plan_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(_serialize, "_TYPE_PLANS", {})
+        monkeypatch.setattr(_serialize, "_MAX_TYPE_PLANS", 2)
+        
+        for i in range(5):
+            cls = type(f"Dynamic{i}", (), {"__str__": lambda self: "dyn"})
+            assert Trace._serialize(cls()) == "dyn"
+        assert len(_serialize._TYPE_PLANS) == 2
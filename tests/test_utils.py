@@ -0,0 +1,60 @@
+"""
+Tests for the utils module.
+"""
+
+import enum
+import json
+from dataclasses import dataclass
+from datetime import date
+from uuid import UUID
+
+from evoloop.utils import safe_deserialize, safe_serialize
+
+
+class Color(enum.Enum):
+    RED = 1
+
+
+@dataclass
+class Point:
+    x: int
+
+
+class TestSafeSerialize:
+    """Tests for safe_serialize."""
+
+    def test_common_types(self):
+        value = {
+            "when": date(2025, 1, 1),
+            "id": UUID(int=1),
+            "tags": {"a"},
+            "raw": b"bytes",
+            "point": Point(1),
+            1: "non-str key",
+        }
+        assert json.loads(safe_serialize(value)) == {
+            "when": "2025-01-01",
+            "id": "00000000-0000-0000-0000-000000000001",
+            "tags": ["a"],
+            "raw": "bytes",
+            "point": {"x": 1},
+            "1": "non-str key",
+        }
+
+    def test_stdlib_output_format(self):
+        """Output matches the stdlib encoder whether or not orjson is installed."""
+        assert safe_serialize({"a": 1, "n": float("nan")}) == '{"a": 1, "n": NaN}'
+        assert safe_serialize(Color.RED) == '"Color.RED"'
+        assert safe_serialize("é") == '"é"'
+
+    def test_never_raises(self):
+        class Broken:
+            def __str__(self):
+                raise RuntimeError("no")
+
+            __repr__ = __str__
+
+        assert isinstance(safe_serialize(Broken()), str)
+
+    def test_round_trip(self):
+        assert safe_deserialize(safe_serialize({"a": [1, "é"]})) == {"a": [1, "é"]}